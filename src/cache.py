@@ -0,0 +1,40 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from sql import Database, LLMCache
+
+
+def make_key(prefix: str, suffix: str, content: str, model_name: str, params: Dict[str, Any]) -> str:
+    """Hash everything that determines an LLM response into a stable cache key."""
+    payload = json.dumps({
+        "prefix": prefix,
+        "suffix": suffix,
+        "content": content,
+        "model": model_name,
+        "params": params,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(params: Dict[str, Any]) -> bool:
+    """Only deterministic generations (no sampling temperature) are worth caching."""
+    return not params.get('temperature') and not params.get('do_sample', False)
+
+
+class ResponseCache:
+    def __init__(self, db: Database, read: bool = True):
+        # With read=False, responses are still stored but never served, e.g. to force fresh summaries
+        self.db = db
+        self.read = read
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.read:
+            return None
+        with self.db.session_scope() as session:
+            entry = session.get(LLMCache, key)
+            return entry.response if entry else None
+
+    def set(self, key: str, value: str) -> None:
+        with self.db.session_scope() as session:
+            session.merge(LLMCache(key=key, response=value))
@@ -65,7 +65,7 @@ class MarkdownExporter:
             filters: Optional filters to apply when querying papers
             title: Custom title for the markdown document
         """
-        papers = self.db.get_papers(filters)
+        papers = self.db.get_papers(filters, columns=['title', 'pdf_url', 'summary'])
         
         if not papers:
             raise ValueError("No papers found in the database with the given filters")
@@ -149,7 +149,7 @@ class ObsidianExporter:
             filters: Optional filters to apply when querying papers
             title: Custom title for the markdown document
         """
-        papers = self.db.get_papers(filters)
+        papers = self.db.get_papers(filters, columns=['title', 'pdf_url', 'summary'])
         
         if not papers:
             raise ValueError("No papers found in the database with the given filters")
@@ -489,7 +489,7 @@ class WebExporter:
             filters: Optional filters to apply when querying papers
             title: Custom title for the HTML page
         """
-        papers = self.db.get_papers(filters)
+        papers = self.db.get_papers(filters, columns=['title', 'pdf_url', 'summary'])
         
         if not papers:
             raise ValueError("No papers found in the database with the given filters")
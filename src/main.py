@@ -1,15 +1,26 @@
 import argparse
+import asyncio
 import os
 import re
 import time
 import yaml
 import hashlib
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+from aiolimiter import AsyncLimiter
 from tqdm import tqdm
 
-from pdf_parser import parse_pdf, clean_text, download_pdf
+from pdf_parser import (
+    parse_and_clean_pdf, clean_text, download_pdf, download_pdf_to_bytes, save_etag_cache, configure_session
+)
 from pdf_scraper import scrape_openreview, scrape_ai_conference, scrape_cvpr
 from sql import Database, Paper
-from summarizer import summarize_text
+from cache import ResponseCache
+from summarizer import summarize_texts_batch, summarize_text_async, create_async_client, truncate_to_tokens
 
 
 def get_db_url():
@@ -31,15 +42,57 @@ def get_db_url():
         return os.getenv('DB_URL', 'sqlite:///data/papers.db')
 
 
+class RateLimiter:
+    """Thread-safe limiter that spaces out calls sharing the same key (e.g. a host) by a minimum interval."""
+
+    def __init__(self, interval):
+        self.interval = interval or 0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, key):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def download_paper(paper_id, url, output_dir, rate_limiter, keep_pdf=True, skip_if_downloaded=False):
+    """
+    Download a single paper's PDF, respecting the per-host rate limit. Runs inside worker threads.
+    Returns the saved file path, or the PDF bytes when keep_pdf is False.
+    """
+    filepath = os.path.join(output_dir, f'{paper_id}.pdf')
+    if keep_pdf and skip_if_downloaded and os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+        # No request is made, so there is nothing to rate-limit
+        return filepath
+
+    rate_limiter.wait(urlparse(url).netloc)
+    if keep_pdf:
+        return download_pdf(f'{paper_id}.pdf', url, output_dir, skip_if_downloaded=skip_if_downloaded)
+    return download_pdf_to_bytes(url)
+
+
 def scrape_papers(config):
     """Scrape papers and store their content in the database without summarization."""
     name = config.get('name', 'Unnamed config')
     print(f"\nScraping papers for configuration: {name}", flush=True)
     
     # Extract parameters from config
+    sconf = config['scraping']
     output_dir = config['paths']['output_dir']
     db_path = config['paths'].get('db_path', get_db_url())
-    platform = config['scraping']['platform']
+    platform = sconf['platform']
+    enforce_rescrape = sconf.get('enforce_rescrape', False)
+    use_pypdf2 = sconf.get('use_pypdf2', True)
+    pdf_backend = sconf.get('pdf_backend', 'pymupdf')
+    keep_pdf = sconf.get('keep_pdf', True)
+    skip_if_downloaded = sconf.get('skip_if_downloaded', False)
+    max_workers = sconf.get('max_workers', 8)
+    # Content beyond the summarization cap is never used, so stop parsing once it is reached
+    max_chars = sconf.get('max_chars', config.get('summarization', {}).get('content_cap'))
     
     # Initialize database
     db = Database(db_path)
@@ -51,59 +104,115 @@ def scrape_papers(config):
     
     # Scrape PDF URLs based on platform
     if platform.lower() == 'openreview':
-        papers = scrape_openreview(**config['scraping']['scraper_params'])
+        papers = scrape_openreview(**sconf['scraper_params'])
     elif platform.lower() == 'ai_conference':
-        papers = scrape_ai_conference(**config['scraping']['scraper_params'])
+        papers = scrape_ai_conference(**sconf['scraper_params'])
     elif platform.lower() == 'cvpr':
-        papers = scrape_cvpr(**config['scraping']['scraper_params'])
+        papers = scrape_cvpr(**sconf['scraper_params'])
     else:
         raise ValueError(f"Unsupported platform: {platform}")
     
-    # Process each paper
-    for paper_id, title, url in tqdm(papers, desc="Scraping papers"):
-        # Create a unique ID using SHA-256 hash
+    # Deduplicate papers, keyed by a unique ID using SHA-256 hash
+    candidates = {}
+    for paper_id, title, url in papers:
         paper_id = hashlib.sha256(paper_id.encode()).hexdigest()
-        title = clean_text(title)
-
-        # Check if the paper already exists in the database
-        existing_papers = db.get_papers(filters={'id': paper_id})
-        if existing_papers:
-            if config['scraping'].get('enforce_rescrape', False) or not existing_papers[0].content:
-                db.delete_paper(paper_id)
-            else:
-                print(f"Skipping {title}, already scraped.")
-                continue
-        
-        # Download PDF
-        pdf_path = download_pdf(f'{paper_id}.pdf', url, output_dir)
-        if not pdf_path:
-            print(f"Failed to download {title}.")
-            continue
-        
-        # Parse and clean PDF
-        raw_content = parse_pdf(pdf_path, use_pypdf2=config['scraping'].get('use_pypdf2', True))
-        content = clean_text(raw_content)
-
-        # Create or update Paper entry
-        paper_entry = Paper(
-            id=paper_id,
-            collection=name,
-            title=title,
-            platform=platform,
-            pdf_url=url,
-            pdf_path=pdf_path,
-            content=content,
-            summary=None  # Summary will be added later
-        )
-        
-        # Add entry to the database
+        candidates.setdefault(paper_id, (clean_text(title), url))
+
+    # Skip papers that were already scraped in a single bulk query; stale entries are overwritten on insert
+    if enforce_rescrape:
+        unprocessed = set(candidates)
+    else:
+        unprocessed = db.filter_unprocessed(list(candidates))
+        print(f"Skipping {len(candidates) - len(unprocessed)} papers, already scraped.")
+    pending = [(paper_id, title, url) for paper_id, (title, url) in candidates.items() if paper_id in unprocessed]
+
+    # Give every download thread its own pooled keep-alive connection
+    configure_session(max_workers)
+
+    # Pipeline: download threads (I/O) feed parse processes (CPU), whose results
+    # are drained by the main thread, the only one writing to the database
+    rate_limiter = RateLimiter(sconf['delay'])
+    batch_size = sconf.get('batch_size', 32)
+    results = queue.Queue()
+    entries = []
+
+    def _flush_entries():
+        # Upsert the accumulated entries in one statement, falling back to
+        # one-by-one upserts so a single bad entry does not drop the whole batch
+        try:
+            db.upsert_papers(entries)
+        except Exception:
+            for entry in entries:
+                try:
+                    db.upsert_paper(entry)
+                except Exception as e:
+                    print(f"Error adding entry to the database: {e}")
+        entries.clear()
+
+    def _on_parsed(paper, pdf, future):
         try:
-            db.add_entry(paper_entry)
+            results.put((paper, pdf, future.result()))
         except Exception as e:
-            print(f"Error adding entry to the database: {e}")
-        
-        # Delay to avoid overwhelming the server
-        time.sleep(config['scraping']['delay'])
+            print(f"Failed to parse {paper[1]}: {e}")
+            results.put((paper, pdf, None))
+
+    def _on_downloaded(paper, future):
+        try:
+            pdf = future.result()
+        except Exception as e:
+            print(f"Failed to download {paper[1]}: {e}")
+            pdf = None
+        if not pdf:
+            results.put((paper, None, None))
+            return
+        # Exceptions raised inside done-callbacks are only logged, so every paper
+        # must still yield a result here or the drain loop below waits forever
+        try:
+            parse_future = parse_pool.submit(parse_and_clean_pdf, pdf, use_pypdf2, max_chars, pdf_backend)
+        except Exception as e:
+            print(f"Failed to parse {paper[1]}: {e}")
+            results.put((paper, pdf, None))
+            return
+        parse_future.add_done_callback(partial(_on_parsed, paper, pdf))
+
+    # Parse workers are started by a forkserver rather than forked from a process
+    # whose download threads may be holding locks
+    with ProcessPoolExecutor(max_workers=sconf.get('parse_workers'),
+                             mp_context=multiprocessing.get_context('forkserver')) as parse_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as download_pool:
+        for paper_id, title, url in pending:
+            download_future = download_pool.submit(
+                download_paper, paper_id, url, output_dir, rate_limiter, keep_pdf, skip_if_downloaded
+            )
+            download_future.add_done_callback(partial(_on_downloaded, (paper_id, title, url)))
+
+        try:
+            for _ in tqdm(range(len(pending)), desc="Scraping papers"):
+                (paper_id, title, url), pdf, content = results.get()
+                if pdf is None:
+                    print(f"Failed to download {title}.")
+                    continue
+                if content is None:
+                    continue
+
+                # Create or update Paper entry
+                entries.append(Paper(
+                    id=paper_id,
+                    collection=name,
+                    title=title,
+                    platform=platform,
+                    pdf_url=url,
+                    pdf_path=pdf if keep_pdf else None,
+                    content=content,
+                    summary=None  # Summary will be added later
+                ))
+                if len(entries) >= batch_size:
+                    _flush_entries()
+        finally:
+            if entries:
+                _flush_entries()
+            if keep_pdf:
+                save_etag_cache(output_dir)
 
 
 def summarize_papers(config):
@@ -111,42 +220,111 @@ def summarize_papers(config):
     name = config.get('name', 'Unnamed config')
     print(f"\nSummarizing papers for configuration: {name}", flush=True)
     
+    # Extract parameters from config
+    sconf = config['summarization']
+    cap_at = sconf['cap_at']
+    content_cap = sconf['content_cap']
+    token_cap = sconf.get('token_cap')
+    batch_size = sconf.get('batch_size', 8)
+    delay = sconf.get('delay')
+
     # Initialize database
     db = Database(config['paths'].get('db_path', get_db_url()))
+    db.create_tables()
+    # Re-summarizing asks for fresh answers, so cached responses are only written, not served
+    enforce_resummary = sconf.get('enforce_resummary', False)
+    cache = ResponseCache(db, read=not enforce_resummary) if sconf.get('use_cache', True) else None
     
     # Get papers based on enforce_resummary setting
-    if config['summarization'].get('enforce_resummary', False):
+    if enforce_resummary:
         # Get all papers with content, regardless of summary status
         papers = db.get_papers(filters={'collection': name})
     else:
         # Get only papers with content but no summary
         papers = db.get_papers(filters={'collection': name, 'summary': None})
     
-    for paper in tqdm(papers, desc="Summarizing papers"):
+    # Cap each paper's content before summarization
+    contents = []
+    for paper in papers:
         content = paper.content
 
-        if config['summarization']['cap_at'] and config['summarization']['cap_at'] in content:
-            content = content[:content.index(config['summarization']['cap_at'])]
-
-        if config['summarization']['content_cap']:
-            content = content[:config['summarization']['content_cap']]
-
-        # Summarize the content
-        summary = summarize_text(
-            prefix=config['summarization']['prefix'],
-            suffix=config['summarization']['suffix'],
-            text=content,
-            provider=config['summarization']['provider'],
-            model_name=config['summarization']['model_name'],
-            **config['summarization']['param']
-        )
-        
-        # Update the paper with the summary
-        db.update_paper(paper.id, {'summary': summary})
-        
-        # Delay between API calls if specified
-        if 'delay' in config['summarization']:
-            time.sleep(config['summarization']['delay'])
+        if cap_at and cap_at in content:
+            content = content[:content.index(cap_at)]
+
+        if content_cap:
+            content = content[:content_cap]
+
+        if token_cap:
+            content = truncate_to_tokens(content, sconf['model_name'], token_cap)
+
+        contents.append(content)
+
+    if sconf['provider'].lower() == 'hf':
+        # Local models generate a padded batch of papers per forward pass
+        with tqdm(total=len(papers), desc="Summarizing papers") as progress:
+            for start in range(0, len(papers), batch_size):
+                batch_papers = papers[start:start + batch_size]
+                summaries = summarize_texts_batch(
+                    prefix=sconf['prefix'],
+                    suffix=sconf['suffix'],
+                    texts=contents[start:start + batch_size],
+                    provider=sconf['provider'],
+                    model_name=sconf['model_name'],
+                    cache=cache,
+                    **sconf['param']
+                )
+
+                # Update the papers with their summaries
+                for paper, summary in zip(batch_papers, summaries):
+                    db.update_paper(paper.id, {'summary': summary})
+                progress.update(len(batch_papers))
+
+                # Delay between batches if specified
+                if delay:
+                    time.sleep(delay)
+    else:
+        # Remote APIs keep up to `concurrency` requests in flight, optionally capped at `rpm` requests per minute
+        asyncio.run(summarize_concurrently(db, papers, contents, sconf, cache))
+
+
+async def summarize_concurrently(db, papers, contents, sconf, cache):
+    """Summarize papers through a remote API with many concurrent requests."""
+    semaphore = asyncio.Semaphore(sconf.get('concurrency', 8))
+    if sconf.get('rpm'):
+        limiter = AsyncLimiter(sconf['rpm'], 60)
+        if sconf.get('delay'):
+            print("Both rpm and delay are set, delay is ignored for remote providers.")
+    elif sconf.get('delay'):
+        # Without rpm, delay keeps its old meaning of a minimum pause between requests
+        limiter = AsyncLimiter(1, sconf['delay'])
+    else:
+        limiter = None
+    loop = asyncio.get_running_loop()
+
+    async with create_async_client(sconf['provider']) as client:
+        async def _summarize(paper, content):
+            async with semaphore:
+                try:
+                    summary = await summarize_text_async(
+                        client,
+                        prefix=sconf['prefix'],
+                        suffix=sconf['suffix'],
+                        text=content,
+                        provider=sconf['provider'],
+                        model_name=sconf['model_name'],
+                        cache=cache,
+                        limiter=limiter,
+                        **sconf['param']
+                    )
+                except Exception as e:
+                    print(f"Failed to summarize {paper.title}: {e}")
+                    return
+            # Database writes are blocking, so keep them off the event loop
+            await loop.run_in_executor(None, db.update_paper, paper.id, {'summary': summary})
+
+        tasks = [asyncio.create_task(_summarize(paper, content)) for paper, content in zip(papers, contents)]
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Summarizing papers"):
+            await task
 
 
 def main():
@@ -1,13 +1,18 @@
 import io
+import json
 import os
 import re
+import shutil
+import threading
 import warnings
 import requests
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+import pymupdf
 import PyPDF2
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_bytes, convert_from_path
 from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
 from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
@@ -16,27 +21,114 @@ from pdfminer.pdfpage import PDFPage
 # Filter PyPDF2 warnings about float objects
 warnings.filterwarnings('ignore', category=UserWarning, module='PyPDF2')
 
+# Shared session so concurrent downloads reuse pooled keep-alive connections.
+# Retries are left to tenacity in the download functions, so the adapter does not retry.
+session = requests.Session()
 
-def download_pdf(filename, url, output_dir):
+
+def configure_session(max_workers=16):
     """
-    Download a PDF file and save it to the specified directory.
+    Size the shared session's connection pool to the number of concurrent downloads,
+    so no thread's keep-alive connection is discarded for lack of a pool slot.
+    
+    :param max_workers: int, number of threads downloading concurrently
+    """
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(max_workers, 1), max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+configure_session()
+
+
+ETAG_CACHE_FILE = 'etag_cache.json'
+_etag_caches = {}
+_etag_lock = threading.Lock()
+
+
+def _get_etag_cache(output_dir):
+    """Load the validators (ETag/Last-Modified) of PDFs downloaded to a directory, once per process."""
+    with _etag_lock:
+        if output_dir not in _etag_caches:
+            path = os.path.join(output_dir, ETAG_CACHE_FILE)
+            try:
+                with open(path, 'r') as f:
+                    _etag_caches[output_dir] = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                _etag_caches[output_dir] = {}
+        return _etag_caches[output_dir]
+
+
+def _record_etag(output_dir, filename, headers):
+    validators = {key: headers[key] for key in ('ETag', 'Last-Modified') if key in headers}
+    if not validators:
+        return
+    cache = _get_etag_cache(output_dir)
+    with _etag_lock:
+        cache[filename] = validators
+
+
+def save_etag_cache(output_dir):
+    """
+    Persist the validators recorded by download_pdf for a directory. Call once after a
+    batch of downloads rather than after each file.
+    
+    :param output_dir: str, directory the PDFs were downloaded to
+    """
+    with _etag_lock:
+        if output_dir not in _etag_caches:
+            return
+        with open(os.path.join(output_dir, ETAG_CACHE_FILE), 'w') as f:
+            json.dump(_etag_caches[output_dir], f)
+
+
+def download_pdf(filename, url, output_dir, skip_if_downloaded=False):
+    """
+    Download a PDF file and save it to the specified directory. If the file was
+    downloaded before, a conditional request avoids transferring it again unless it changed.
     
     :param title: str, title of the paper
     :param url: str, URL of the PDF
     :param output_dir: str, directory to save the PDF
+    :param skip_if_downloaded: bool, reuse an existing non-empty file without contacting the server (default: False)
     """
+    filepath = os.path.join(output_dir, filename)
+    downloaded = os.path.exists(filepath) and os.path.getsize(filepath) > 0
+    if downloaded and skip_if_downloaded:
+        return filepath
+
+    headers = {}
+    if downloaded:
+        validators = _get_etag_cache(output_dir).get(filename, {})
+        if 'ETag' in validators:
+            headers['If-None-Match'] = validators['ETag']
+        if 'Last-Modified' in validators:
+            headers['If-Modified-Since'] = validators['Last-Modified']
+
     @retry(
         retry=retry_if_exception_type(Exception),
         wait=wait_exponential(multiplier=1, min=4, max=60),
         stop=stop_after_attempt(5)
     )
     def _download_with_retry():
-        response = requests.get(url)
-        if response.status_code != 200:
-            raise Exception(f"Failed to download PDF: HTTP {response.status_code}")
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        with session.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                return filepath
+            if response.status_code != 200:
+                raise Exception(f"Failed to download PDF: HTTP {response.status_code}")
+            # Copy the raw stream straight to disk instead of buffering the whole PDF,
+            # via a temporary file so an interrupted download never looks complete
+            response.raw.decode_content = True
+            partial_path = filepath + '.part'
+            try:
+                with open(partial_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 16)
+                os.replace(partial_path, filepath)
+            except Exception:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+            _record_etag(output_dir, filename, response.headers)
         return filepath
 
     try:
@@ -46,22 +138,92 @@ def download_pdf(filename, url, output_dir):
         return None
 
 
-def parse_pdf(pdf_path, use_pypdf2=True):
+def download_pdf_to_bytes(url):
+    """
+    Download a PDF file into memory, for parsing without writing it to disk.
+    
+    :param url: str, URL of the PDF
+    :return: bytes, content of the PDF, or None if the download failed
+    """
+    @retry(
+        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=60),
+        stop=stop_after_attempt(5)
+    )
+    def _download_with_retry():
+        with session.get(url, timeout=30) as response:
+            if response.status_code != 200:
+                raise Exception(f"Failed to download PDF: HTTP {response.status_code}")
+            return response.content
+
+    try:
+        return _download_with_retry()
+    except Exception as e:
+        print(f"Failed to download after retries: {str(e)}")
+        return None
+
+
+def _open_pdf(pdf):
+    """Open a PDF given either as a file path or as its raw bytes."""
+    if isinstance(pdf, bytes):
+        return io.BytesIO(pdf)
+    return open(pdf, 'rb')
+
+
+def _parse_pymupdf(pdf, max_chars=None):
+    """
+    Extract text with PyMuPDF (MuPDF), which is much faster than the pure-Python parsers.
+    
+    :param pdf: str or bytes, path to the PDF file or its raw content
+    :param max_chars: int, stop reading further pages once the cleaned text reaches this length (default: None)
+    :return: str, extracted text from the PDF
+    """
+    text = ""
+    cleaned_chars = 0
+    document = pymupdf.open(stream=pdf, filetype='pdf') if isinstance(pdf, bytes) else pymupdf.open(pdf)
+    with document:
+        for page in document:
+            page_text = page.get_text("text")
+            text += page_text
+            cleaned_chars += _cleaned_length(page_text)
+            if max_chars and cleaned_chars >= max_chars:
+                break
+    return text
+
+
+def parse_pdf(pdf, use_pypdf2=True, max_chars=None, backend='pymupdf'):
     """
     Parse a PDF file into plain text, handling both single-column and double-column layouts.
-    Uses pdfminer by default, falls back to OCR for images, and optionally can use PyPDF2.
+    Uses PyMuPDF by default, then pdfminer, falls back to OCR for images, and optionally can use PyPDF2.
     
-    :param pdf_path: str, path to the PDF file
-    :param use_pypdf2: bool, whether to use PyPDF2 as the first method (default: True)
+    :param pdf: str or bytes, path to the PDF file or its raw content
+    :param use_pypdf2: bool, whether to use PyPDF2 before pdfminer (default: True)
+    :param max_chars: int, stop reading further pages once the cleaned text reaches this length (default: None)
+    :param backend: str, fast parser to try first, 'pymupdf' or None to skip it (default: 'pymupdf')
     :return: str, extracted text from the PDF
     """
+    if backend == 'pymupdf':
+        try:
+            text = _parse_pymupdf(pdf, max_chars=max_chars)
+            if text.strip():
+                return text
+        except Exception:
+            pass  # Fall through to the pure-Python parsers if PyMuPDF fails
+    elif backend is not None:
+        raise ValueError(f"Unsupported PDF parsing backend: {backend}")
+
     if use_pypdf2:
         try:
             text = ""
-            with open(pdf_path, 'rb') as file:
+            cleaned_chars = 0
+            with _open_pdf(pdf) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page in pdf_reader.pages:
-                    text += page.extract_text()
+                    page_text = page.extract_text()
+                    text += page_text
+                    cleaned_chars += _cleaned_length(page_text)
+                    if max_chars and cleaned_chars >= max_chars:
+                        break
             if text.strip():
                 return text
         except Exception:
@@ -75,9 +237,15 @@ def parse_pdf(pdf_path, use_pypdf2=True):
         converter = TextConverter(resource_manager, fake_file_handle, laparams=LAParams())
         page_interpreter = PDFPageInterpreter(resource_manager, converter)
         
-        with open(pdf_path, 'rb') as fh:
+        with _open_pdf(pdf) as fh:
+            cleaned_chars = 0
             for page in PDFPage.get_pages(fh, caching=True, check_extractable=True):
+                page_start = fake_file_handle.tell()
                 page_interpreter.process_page(page)
+                if max_chars:
+                    cleaned_chars += _cleaned_length(fake_file_handle.getvalue()[page_start:])
+                    if cleaned_chars >= max_chars:
+                        break
             text = fake_file_handle.getvalue()
         converter.close()
         fake_file_handle.close()
@@ -90,9 +258,14 @@ def parse_pdf(pdf_path, use_pypdf2=True):
     # If pdfminer fails, use OCR as last resort
     try:
         text = ""
-        images = convert_from_path(pdf_path)
+        images = convert_from_bytes(pdf) if isinstance(pdf, bytes) else convert_from_path(pdf)
+        cleaned_chars = 0
         for image in images:
-            text += pytesseract.image_to_string(image)
+            page_text = pytesseract.image_to_string(image)
+            text += page_text
+            cleaned_chars += _cleaned_length(page_text)
+            if max_chars and cleaned_chars >= max_chars:
+                break
         return text
     except Exception as e:
         print(f"All PDF parsing methods failed. Last error: {str(e)}")
@@ -109,6 +282,27 @@ def clean_text(text):
     # Remove extra whitespace
     text = ' '.join(text.split())
     # Remove non-UTF-8 characters
-    text = ''.join(char for char in text if ord(char) < 128)
+    text = text.encode('ascii', 'ignore').decode('ascii')
         
     return text
+
+
+def _cleaned_length(text):
+    """
+    Length of a page's text after cleaning. Summed over pages, it never exceeds the
+    cleaned length of the joined pages, so it is safe for deciding when to stop parsing.
+    """
+    return len(clean_text(text))
+
+
+def parse_and_clean_pdf(pdf, use_pypdf2=True, max_chars=None, backend='pymupdf'):
+    """
+    Parse a PDF and clean the extracted text. Kept at module level so it can run in a process pool.
+    
+    :param pdf: str or bytes, path to the PDF file or its raw content
+    :param use_pypdf2: bool, whether to use PyPDF2 as the first method (default: True)
+    :param max_chars: int, stop reading further pages once the cleaned text reaches this length (default: None)
+    :param backend: str, fast parser to try first, 'pymupdf' or None to skip it (default: 'pymupdf')
+    :return: str, cleaned text from the PDF
+    """
+    return clean_text(parse_pdf(pdf, use_pypdf2=use_pypdf2, max_chars=max_chars, backend=backend))
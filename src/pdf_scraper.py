@@ -2,10 +2,14 @@ import os
 import subprocess
 import sys
 import time
+from functools import lru_cache
 
 from tqdm import tqdm
 import requests
 from selenium import webdriver
+from selenium.common.exceptions import (
+    NoSuchElementException, StaleElementReferenceException, TimeoutException, WebDriverException
+)
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service as FirefoxService
@@ -16,6 +20,15 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 from urllib.parse import urljoin
 
 
+@lru_cache(maxsize=1)
+def get_geckodriver_path():
+    """
+    Resolve the geckodriver path once per process instead of on every driver setup.
+    A GECKODRIVER_PATH environment variable skips the driver manager's online check entirely.
+    """
+    return os.getenv('GECKODRIVER_PATH') or GeckoDriverManager().install()
+
+
 def check_firefox_installation():
     """
     Check Firefox ESR installation and print debug information.
@@ -26,7 +39,7 @@ def check_firefox_installation():
         print(f"Firefox ESR version: {firefox_version}")
         
         # Check geckodriver
-        driver_path = GeckoDriverManager().install()
+        driver_path = get_geckodriver_path()
         print(f"Geckodriver path: {driver_path}")
         
         return True
@@ -68,7 +81,7 @@ def setup_firefox_driver():
     try:
         print("Setting up Firefox ESR driver...")
         service = FirefoxService(
-            GeckoDriverManager().install(),
+            get_geckodriver_path(),
             log_output=os.path.devnull  # Suppress Geckodriver logs
         )
         
@@ -102,7 +115,128 @@ def setup_driver(browser_name):
         raise ValueError(f"Unsupported browser: {browser_name}")
 
 
-def scrape_openreview(conference, year, track, submission_type=None, num_cap=None, browser_name="firefox"):
+OPENREVIEW_API_URL = "https://api2.openreview.net/notes"
+
+
+def scrape_openreview(conference, year, track, submission_type=None, num_cap=None, browser_name="firefox", use_api=True):
+    """
+    Scrape OpenReview for PDFs based on given parameters. Uses the OpenReview JSON API,
+    falling back to Selenium if the API is disabled or returns nothing.
+    
+    :param conference: str, conference name (e.g., 'ICLR', 'NeurIPS')
+    :param year: int, year of the conference
+    :param track: str, track name (e.g., 'Poster', 'Oral')
+    :param submission_type: str, type of submission
+    :param num_cap: int, maximum number of papers to scrape
+    :param use_api: bool, whether to try the JSON API before Selenium (default: True)
+    :return: list of tuples (paper_id, paper_title, pdf_url)
+    """
+    if use_api:
+        try:
+            papers = scrape_openreview_api(conference, year, track, submission_type, num_cap)
+            if papers:
+                return papers
+            print("OpenReview API returned no papers, falling back to Selenium.")
+        except Exception as e:
+            print(f"OpenReview API failed ({str(e)}), falling back to Selenium.")
+
+    return scrape_openreview_selenium(conference, year, track, submission_type, num_cap, browser_name)
+
+
+def scrape_openreview_api(conference, year, track, submission_type=None, num_cap=None):
+    """
+    Fetch accepted papers of an OpenReview venue through its JSON API.
+    
+    The submission type is matched against each note's venue string, e.g.
+    'tab-accept-oral' keeps notes whose venue reads 'ICLR 2024 oral' and
+    'notable-top-5-' keeps 'ICLR 2023 notable top 5%'. Raises ValueError if
+    no keyword can be derived from the submission type.
+    
+    :return: list of tuples (paper_id, paper_title, pdf_url)
+    """
+    @retry(
+        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=30),
+        stop=stop_after_attempt(3)
+    )
+    def _get_notes(offset):
+        response = requests.get(OPENREVIEW_API_URL, params={
+            "content.venueid": venue_id,
+            "limit": page_size,
+            "offset": offset
+        }, timeout=30)
+        response.raise_for_status()
+        return response.json()["notes"]
+
+    venue_id = f"{conference}/{year}/{track}"
+    venue_keyword = None
+    if submission_type:
+        # Drop empty segments and the generic tab/accept words, keep the rest as a phrase
+        words = [word for word in submission_type.lower().split('-') if word and word not in ('tab', 'accept')]
+        if not words:
+            raise ValueError(f"Cannot derive a venue keyword from submission type: {submission_type}")
+        venue_keyword = ' '.join(words)
+    page_size = 1000
+    papers = []
+    offset = 0
+
+    while True:
+        print(f"Fetching notes {offset} to {offset + page_size} from {venue_id}", flush=True)
+        notes = _get_notes(offset)
+        for note in notes:
+            content = note.get("content", {})
+            title = content.get("title", {}).get("value", "").strip()
+            venue = content.get("venue", {}).get("value", "").lower()
+            if not title or (venue_keyword and venue_keyword not in venue):
+                continue
+
+            # Same ID scheme as the Selenium scraper so existing entries are recognized
+            paper_id = f'{title}_{conference}_{year}_{track}_{submission_type}'
+            papers.append((paper_id, title, f"https://openreview.net/pdf?id={note['id']}"))
+            if num_cap is not None and len(papers) >= num_cap:
+                print(f"Reached paper cap of {num_cap}")
+                return papers
+
+        if len(notes) < page_size:
+            break
+        offset += page_size
+
+    print(f"Found {len(papers)} papers")
+    return papers
+
+
+def _page_changed(first_note, first_title):
+    """
+    Wait condition that holds once the first note of the current page has been
+    replaced, either by re-rendering (stale element) or by updating its title in place.
+    """
+    def _condition(driver):
+        if EC.staleness_of(first_note)(driver):
+            return True
+        try:
+            return first_note.find_element(By.TAG_NAME, "h4").text.strip() != first_title
+        except StaleElementReferenceException:
+            return True
+    return _condition
+
+
+def _driver_is_usable(driver, error):
+    """
+    Decide whether a driver can be reused after an error. Waits and element lookups
+    fail at page level, while other WebDriver errors (e.g. InvalidSessionIdException)
+    mean the browser itself is gone; otherwise, probe the session to be sure.
+    """
+    page_errors = (TimeoutException, NoSuchElementException, StaleElementReferenceException)
+    if isinstance(error, WebDriverException) and not isinstance(error, page_errors):
+        return False
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def scrape_openreview_selenium(conference, year, track, submission_type=None, num_cap=None, browser_name="firefox"):
     """
     Scrape OpenReview for PDFs based on given parameters using Selenium with Firefox.
     
@@ -111,7 +245,7 @@ def scrape_openreview(conference, year, track, submission_type=None, num_cap=Non
     :param track: str, track name (e.g., 'Poster', 'Oral')
     :param submission_type: str, type of submission
     :param num_cap: int, maximum number of papers to scrape
-    :return: list of tuples (paper_title, pdf_url)
+    :return: list of tuples (paper_id, paper_title, pdf_url)
     """
     base_url = f"https://openreview.net/group?id={conference}/{year}/{track}"
     if submission_type is not None:
@@ -120,111 +254,129 @@ def scrape_openreview(conference, year, track, submission_type=None, num_cap=Non
     driver = None
     retry_count = 0
     
-    while retry_count < 5:
-        try:
-            print(f"\nAttempt {retry_count + 1} of 5")
-            print(f"Initializing Firefox driver...")
-            driver = setup_driver(browser_name)
+    try:
+        while retry_count < 5:
+            try:
+                print(f"\nAttempt {retry_count + 1} of 5")
+                # Start the browser once and reuse it across retries
+                if driver is None:
+                    print(f"Initializing Firefox driver...")
+                    driver = setup_driver(browser_name)
             
-            print(f"Navigating to URL: {base_url}")
-            driver.get(base_url)
+                print(f"Navigating to URL: {base_url}")
+                driver.get(base_url)
             
-            papers = []
-            page_number = 1
+                papers = []
+                page_number = 1
             
-            while True:
-                print(f"Processing page {page_number}", flush=True)
-                # Wait for the content to load with increased timeout
-                print("Waiting for content to load...")
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "note"))
-                )
+                while True:
+                    print(f"Processing page {page_number}", flush=True)
+                    # Wait for the content to load with increased timeout
+                    print("Waiting for content to load...")
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "note"))
+                    )
             
-                # Scroll to load all papers on the current page
-                print("Scrolling through page...")
-                last_height = driver.execute_script("return document.body.scrollHeight")
-                scroll_attempts = 0
-                max_scroll_attempts = 10
+                    # Scroll to load all papers on the current page
+                    print("Scrolling through page...")
+                    last_height = driver.execute_script("return document.body.scrollHeight")
+                    scroll_attempts = 0
+                    max_scroll_attempts = 10
             
-                while scroll_attempts < max_scroll_attempts:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(3)  # Increased wait time
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-                    scroll_attempts += 1
+                    while scroll_attempts < max_scroll_attempts:
+                        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                        # Continue as soon as new content extends the page, stop if none arrives
+                        try:
+                            WebDriverWait(driver, 5).until(
+                                lambda d: d.execute_script("return document.body.scrollHeight") != last_height
+                            )
+                        except TimeoutException:
+                            break
+                        last_height = driver.execute_script("return document.body.scrollHeight")
+                        scroll_attempts += 1
             
-                # Extract paper information
-                print("Extracting paper information...")
-                notes = driver.find_elements(By.CLASS_NAME, "note")
+                    # Extract paper information
+                    print("Extracting paper information...")
+                    notes = driver.find_elements(By.CLASS_NAME, "note")
             
-                for paper in notes:
-                    try:
-                        title = paper.find_element(By.TAG_NAME, "h4").text.strip()
-                        pdf_links = paper.find_elements(By.XPATH, ".//a[@title='Download PDF']")
-                        if pdf_links and len(title.strip()) > 0:
-                            pdf_url = pdf_links[0].get_attribute("href")
-                            paper_id = f'{title}_{conference}_{year}_{track}_{submission_type}'
-                            papers.append((paper_id, title, pdf_url))
-                            print(f"Found paper: {title}")
+                    for paper in notes:
+                        try:
+                            title = paper.find_element(By.TAG_NAME, "h4").text.strip()
+                            pdf_links = paper.find_elements(By.XPATH, ".//a[@title='Download PDF']")
+                            if pdf_links and len(title.strip()) > 0:
+                                pdf_url = pdf_links[0].get_attribute("href")
+                                paper_id = f'{title}_{conference}_{year}_{track}_{submission_type}'
+                                papers.append((paper_id, title, pdf_url))
+                                print(f"Found paper: {title}")
                             
-                            # Check if we've reached the num_cap
-                            if num_cap is not None and len(papers) >= num_cap:
-                                print(f"Reached paper cap of {num_cap}")
-                                return papers
+                                # Check if we've reached the num_cap
+                                if num_cap is not None and len(papers) >= num_cap:
+                                    print(f"Reached paper cap of {num_cap}")
+                                    return papers
                                 
-                    except Exception as e:
-                        print(f"Error extracting paper info: {str(e)}")
-                        continue
+                        except Exception as e:
+                            print(f"Error extracting paper info: {str(e)}")
+                            continue
 
-                # Store current page papers for comparison
-                current_page_titles = [note.find_element(By.TAG_NAME, "h4").text.strip() 
-                                       for note in notes]
+                    # Store current page papers for comparison
+                    current_page_titles = [note.find_element(By.TAG_NAME, "h4").text.strip() 
+                                           for note in notes]
                 
-                # Check if there's a next page
-                try:
-                    next_button = driver.find_element(By.XPATH, "//li[contains(@class, 'right-arrow')]/a/span[text()='›']")
-                    print("Moving to the next page...", flush=True)
-                    # Scroll the button into view using JavaScript
-                    driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                    # Wait a moment for the scroll to complete
-                    time.sleep(1)
-                    driver.execute_script("arguments[0].click();", next_button)
-                    time.sleep(3)  # Wait for the next page to load
-
-                    # Check if we're still on the same page by comparing paper titles
-                    new_notes = driver.find_elements(By.CLASS_NAME, "note")
-                    new_page_titles = [note.find_element(By.TAG_NAME, "h4").text.strip() 
-                                     for note in new_notes]
+                    # Check if there's a next page
+                    try:
+                        next_button = driver.find_element(By.XPATH, "//li[contains(@class, 'right-arrow')]/a/span[text()='›']")
+                        print("Moving to the next page...", flush=True)
+                        # Scroll the button into view using JavaScript
+                        driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
+                        driver.execute_script("arguments[0].click();", next_button)
+
+                        # Wait for the next page to replace the current notes; if nothing changes, this was the last page
+                        try:
+                            WebDriverWait(driver, 10).until(_page_changed(notes[0], current_page_titles[0]))
+                        except TimeoutException:
+                            print("Reached the last page (page content did not change)", flush=True)
+                            break
+
+                        # Check if we're still on the same page by comparing paper titles
+                        new_notes = driver.find_elements(By.CLASS_NAME, "note")
+                        new_page_titles = [note.find_element(By.TAG_NAME, "h4").text.strip() 
+                                         for note in new_notes]
                     
-                    if current_page_titles == new_page_titles:
-                        print("Reached the last page (detected by content comparison)", flush=True)
-                        break
+                        if current_page_titles == new_page_titles:
+                            print("Reached the last page (detected by content comparison)", flush=True)
+                            break
                     
-                    page_number += 1
-                except Exception as e:
-                    print(f"Navigation error: {e}", flush=True)
-                    print("No more pages or error finding next button.", flush=True)
-                    break
+                        page_number += 1
+                    except Exception as e:
+                        print(f"Navigation error: {e}", flush=True)
+                        print("No more pages or error finding next button.", flush=True)
+                        break
             
-            return papers
+                return papers
             
-        except Exception as e:
-            print(f"Error during scraping (attempt {retry_count + 1}): {str(e)}")
-            retry_count += 1
-            if retry_count < 5:
-                print("Retrying...")
-                time.sleep(5)  # Wait before retrying
-            else:
-                print("Max retries reached. Giving up.")
-                raise
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    print(f"Error closing driver: {str(e)}")
+            except Exception as e:
+                print(f"Error during scraping (attempt {retry_count + 1}): {str(e)}")
+                # Page-level errors keep the browser; a crashed browser or lost session gets a fresh one
+                if driver is not None and not _driver_is_usable(driver, e):
+                    print("Browser session lost, restarting the driver on the next attempt.")
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+                retry_count += 1
+                if retry_count < 5:
+                    print("Retrying...")
+                    time.sleep(5)  # Wait before retrying
+                else:
+                    print("Max retries reached. Giving up.")
+                    raise
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error closing driver: {str(e)}")
 
 
 def scrape_ai_conference(conference, year, filter_name=None, filter_value=None, max_papers=None, browser_name="firefox"):
@@ -372,7 +524,10 @@ def scrape_cvpr(year, filter_name=None, filter_value=None, max_papers=None, brow
         driver = setup_driver(browser_name)
         print(f"Fetching papers from CVPR: {base_url}")
         driver.get(base_url)
-        time.sleep(10)  # Wait for dynamic content
+        # Wait for dynamic content
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "a[href*='poster/']"))
+        )
         
         # Get all paper links from the filtered page
         paper_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='poster/']")
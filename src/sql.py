@@ -1,12 +1,17 @@
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Set
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import load_only, scoped_session, sessionmaker
 
 Base = declarative_base()
 
+# Keep IN (...) lists below SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK = 500
+
 class Paper(Base):
     __tablename__ = 'Paper'
 
@@ -24,42 +29,107 @@ class Paper(Base):
         return f"<Paper(id={self.id}, title='{self.title}', platform='{self.platform}')>"
 
 
+class LLMCache(Base):
+    __tablename__ = 'LLMCache'
+
+    key = Column(String, primary_key=True)
+    response = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<LLMCache(key={self.key}, created_at='{self.created_at}')>"
+
+
 class Database:
     def __init__(self, db_url: str):
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+        if db_url.startswith('sqlite'):
+            self.engine = create_engine(db_url, connect_args={'check_same_thread': False})
+            event.listen(self.engine, 'connect', self._set_sqlite_pragmas)
+        else:
+            self.engine = create_engine(db_url)
+        self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
+
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers and the writer proceed concurrently, and NORMAL sync
+        # only fsyncs at checkpoints instead of on every commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @contextmanager
+    def session_scope(self):
+        """Provide a transactional scope around a series of operations."""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.Session.remove()
 
     def create_tables(self):
         Base.metadata.create_all(self.engine)
 
-    def add_entry(self, paper: Paper) -> None:
-        session = self.Session()
-        session.add(paper)
-        session.commit()
-        session.close()
+    def upsert_paper(self, paper: Paper) -> None:
+        self.upsert_papers([paper])
 
-    def get_papers(self, filters: Dict[str, Any] = None) -> List[Paper]:
-        session = self.Session()
-        query = session.query(Paper)
-        if filters:
-            query = query.filter_by(**filters)
-        papers = query.all()
-        session.close()
-        return papers
+    def upsert_papers(self, papers: List[Paper]) -> None:
+        """Insert papers, overwriting any existing rows with the same ID in the same statement."""
+        if not papers:
+            return
+        rows = [{column.name: getattr(paper, column.name) for column in Paper.__table__.columns} for paper in papers]
+        dialect = self.engine.dialect.name
+        with self.session_scope() as session:
+            if dialect in ('sqlite', 'postgresql'):
+                insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+                stmt = insert(Paper).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['id'],
+                    set_={column: stmt.excluded[column] for column in rows[0] if column != 'id'}
+                )
+                session.execute(stmt)
+            else:
+                for paper in papers:
+                    session.merge(paper)
+
+    def get_papers(self, filters: Dict[str, Any] = None, columns: List[str] = None) -> List[Paper]:
+        """
+        Query papers, optionally loading only the given columns. The returned papers are
+        detached from their session, so with `columns` set, reading any attribute that was
+        not listed raises DetachedInstanceError instead of lazily loading it.
+        """
+        with self.session_scope() as session:
+            query = session.query(Paper)
+            if columns:
+                # Skip loading the large content/summary columns unless asked for
+                query = query.options(load_only(*(getattr(Paper, column) for column in columns)))
+            if filters:
+                query = query.filter_by(**filters)
+            return query.all()
+
+    def filter_unprocessed(self, paper_ids: List[str], column: str = 'content') -> Set[str]:
+        """
+        Return the subset of paper_ids that have no value in the given column yet, using one query per chunk.
+        Empty strings count as no value, since parsing yields "" when every method fails.
+        """
+        processed = set()
+        value = getattr(Paper, column)
+        with self.session_scope() as session:
+            for start in range(0, len(paper_ids), IN_CLAUSE_CHUNK):
+                chunk = paper_ids[start:start + IN_CLAUSE_CHUNK]
+                rows = session.query(Paper.id).filter(Paper.id.in_(chunk), value.isnot(None), value != '')
+                processed.update(row.id for row in rows)
+        return set(paper_ids) - processed
 
     def update_paper(self, paper_id: str, updates: Dict[str, Any]) -> None:
-        session = self.Session()
-        paper = session.query(Paper).filter_by(id=paper_id).first()
-        if paper:
-            for key, value in updates.items():
-                setattr(paper, key, value)
-            session.commit()
-        session.close()
+        with self.session_scope() as session:
+            session.query(Paper).filter_by(id=paper_id).update(updates)
 
     def delete_paper(self, paper_id: str) -> None:
-        session = self.Session()
-        paper = session.query(Paper).filter_by(id=paper_id).first()
-        if paper:
-            session.delete(paper)
-            session.commit()
-        session.close()
+        with self.session_scope() as session:
+            session.query(Paper).filter_by(id=paper_id).delete()
+
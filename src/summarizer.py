@@ -1,10 +1,40 @@
+import asyncio
+from functools import lru_cache
+from contextlib import nullcontext
+
+import tiktoken
 import torch
 from transformers import pipeline
-from openai import OpenAI
-from anthropic import Anthropic
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from cache import make_key, is_cacheable
+
+
+def truncate_to_tokens(text, model_name, max_tokens):
+    """
+    Truncate text to at most max_tokens tokens, so the prompt stays within the model's context.
+    
+    Args:
+    text (str): The text to truncate.
+    model_name (str): The model whose tokenizer to use; unknown models fall back to cl100k_base.
+    max_tokens (int): The maximum number of tokens to keep.
+    
+    Returns:
+    str: The truncated text.
+    """
+    try:
+        encoding = tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
 
+@lru_cache(maxsize=1)
 def load_model(model_name):
     """
     Load a designated open-source LLM from Hugging Face using pipeline.
@@ -38,6 +68,27 @@ def generate_summary_hf(model_pipeline, prompt, **kwargs):
     return summary
 
 
+def generate_summaries_hf(model_pipeline, prompts, **kwargs):
+    """
+    Generate summaries for several prompts in one padded forward pass.
+    
+    Args:
+    model_pipeline: The loaded language model pipeline.
+    prompts (list): The input prompts for summarization.
+    
+    Returns:
+    list: The generated summaries, in the same order as the prompts.
+    """
+    tokenizer = model_pipeline.tokenizer
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    # Decoder-only models must be left-padded so generation continues from the prompt
+    tokenizer.padding_side = "left"
+
+    outputs = model_pipeline(prompts, batch_size=len(prompts), **kwargs)
+    return [output[0]['generated_text'][len(prompt):].strip() for prompt, output in zip(prompts, outputs)]
+
+
 def generate_summary_openai(prompt, engine, **kwargs):
     """Generate a summary using OpenAI's API with retry logic for rate limits."""
     openai = OpenAI()
@@ -77,7 +128,48 @@ def generate_summary_claude(prompt, engine, **kwargs):
         
     return _generate_with_retry()
 
-def summarize_text(prefix, suffix, text, provider, model_name, **kwargs):
+
+async def generate_summary_openai_async(client, prompt, engine, limiter=None, **kwargs):
+    """Generate a summary using OpenAI's async API with retry logic for rate limits."""
+    @retry(
+        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=60),
+        stop=stop_after_attempt(5)
+    )
+    async def _generate_with_retry():
+        # Acquire the limiter per attempt so retried requests count against the rate limit too
+        async with limiter or nullcontext():
+            chat_completion = await client.chat.completions.create(
+                model=engine,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+        return chat_completion.choices[0].message.content.strip()
+
+    return await _generate_with_retry()
+
+
+async def generate_summary_claude_async(client, prompt, engine, limiter=None, **kwargs):
+    """Generate a summary using Claude's async API with retry logic for rate limits."""
+    @retry(
+        retry=retry_if_exception_type(Exception),
+        wait=wait_exponential(multiplier=1, min=4, max=60),
+        stop=stop_after_attempt(5)
+    )
+    async def _generate_with_retry():
+        # Acquire the limiter per attempt so retried requests count against the rate limit too
+        async with limiter or nullcontext():
+            response = await client.messages.create(
+                model=engine,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+        return response.content[0].text.strip()
+
+    return await _generate_with_retry()
+
+
+def summarize_text(prefix, suffix, text, provider, model_name, cache=None, **kwargs):
     """
     Main function to summarize text using a specified model or API.
     
@@ -85,18 +177,117 @@ def summarize_text(prefix, suffix, text, provider, model_name, **kwargs):
     text (str): The text to summarize.
     provider (str): The provider of the model (e.g., "openai", "claude", "hf").
     model_name (str): The name of the model to use (e.g., "facebook/opt-350m", "chatgpt-4o").
+    cache (ResponseCache): Optional cache of previous responses, used for deterministic generations only.
     
     Returns:
     str: The generated summary.
     """
+    key = None
+    if cache is not None and is_cacheable(kwargs):
+        key = make_key(prefix, suffix, text, model_name, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     prompt = f"{prefix}\n\n{text}\n\n{suffix}"
     
     if provider.lower() == "openai":
-        return generate_summary_openai(prompt, model_name, **kwargs)
+        summary = generate_summary_openai(prompt, model_name, **kwargs)
     elif provider.lower() == "claude":
-        return generate_summary_claude(prompt, model_name, **kwargs)
+        summary = generate_summary_claude(prompt, model_name, **kwargs)
     elif provider.lower() == "hf":
         model_pipeline = load_model(model_name)
-        return generate_summary_hf(model_pipeline, prompt, **kwargs)
+        summary = generate_summary_hf(model_pipeline, prompt, **kwargs)
     else:
         raise ValueError(f"Unsupported provider: {provider}")
+
+    if key is not None:
+        cache.set(key, summary)
+    return summary
+
+
+def create_async_client(provider):
+    """Create the async API client for a remote provider, to be shared by concurrent requests."""
+    if provider.lower() == "openai":
+        return AsyncOpenAI()
+    elif provider.lower() == "claude":
+        return AsyncAnthropic()
+    else:
+        raise ValueError(f"Unsupported provider for async summarization: {provider}")
+
+
+async def summarize_text_async(client, prefix, suffix, text, provider, model_name, cache=None, limiter=None, **kwargs):
+    """
+    Async counterpart of summarize_text for remote APIs, so many requests can be in flight at once.
+    
+    Args:
+    client: The async API client created by create_async_client.
+    text (str): The text to summarize.
+    provider (str): The provider of the model (e.g., "openai", "claude").
+    model_name (str): The name of the model to use (e.g., "chatgpt-4o").
+    cache (ResponseCache): Optional cache of previous responses, used for deterministic generations only.
+    limiter: Optional async context manager acquired before every API request, including retries.
+    
+    Returns:
+    str: The generated summary.
+    """
+    # Cache lookups are blocking database calls, so keep them off the event loop
+    loop = asyncio.get_running_loop()
+    key = None
+    if cache is not None and is_cacheable(kwargs):
+        key = make_key(prefix, suffix, text, model_name, kwargs)
+        cached = await loop.run_in_executor(None, cache.get, key)
+        if cached is not None:
+            return cached
+
+    prompt = f"{prefix}\n\n{text}\n\n{suffix}"
+
+    if provider.lower() == "openai":
+        summary = await generate_summary_openai_async(client, prompt, model_name, limiter=limiter, **kwargs)
+    elif provider.lower() == "claude":
+        summary = await generate_summary_claude_async(client, prompt, model_name, limiter=limiter, **kwargs)
+    else:
+        raise ValueError(f"Unsupported provider for async summarization: {provider}")
+
+    if key is not None:
+        await loop.run_in_executor(None, cache.set, key, summary)
+    return summary
+
+
+def summarize_texts_batch(prefix, suffix, texts, provider, model_name, cache=None, **kwargs):
+    """
+    Summarize several texts at once with a HuggingFace model, as a single padded batch.
+    Remote APIs are summarized concurrently through summarize_text_async instead.
+    
+    Args:
+    texts (list): The texts to summarize.
+    provider (str): The provider of the model; only "hf" supports batching.
+    model_name (str): The name of the model to use (e.g., "facebook/opt-350m").
+    cache (ResponseCache): Optional cache of previous responses, used for deterministic generations only.
+    
+    Returns:
+    list: The generated summaries in the same order as the texts.
+    """
+    summaries = [None] * len(texts)
+    keys = [None] * len(texts)
+    if cache is not None and is_cacheable(kwargs):
+        for i, text in enumerate(texts):
+            keys[i] = make_key(prefix, suffix, text, model_name, kwargs)
+            summaries[i] = cache.get(keys[i])
+
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if not missing:
+        return summaries
+    prompts = [f"{prefix}\n\n{texts[i]}\n\n{suffix}" for i in missing]
+
+    if provider.lower() == "hf":
+        model_pipeline = load_model(model_name)
+        generated = generate_summaries_hf(model_pipeline, prompts, **kwargs)
+    else:
+        raise ValueError(f"Unsupported provider for batch summarization: {provider}")
+
+    for i, summary in zip(missing, generated):
+        summaries[i] = summary
+        if keys[i] is not None:
+            cache.set(keys[i], summary)
+    return summaries